@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Export TrOCR for fast cold starts
+Run once; standalone_ocr_test.py picks the export up automatically
+
+Saves the processor and model to a local directory as safetensors, so
+startup memory-maps the weights from disk instead of resolving them through
+the HuggingFace hub cache, and skips random weight initialization
+(low_cpu_mem_usage). Weights are stored in FP32; FP16/INT8 conversion still
+happens at load time for the device in use.
+
+Usage:
+    python export_trocr.py
+    TROCR_EXPORT_DIR=/models/trocr python export_trocr.py
+"""
+
+import os
+from pathlib import Path
+
+TROCR_MODEL_NAME = "microsoft/trocr-base-printed"
+TROCR_EXPORT_DIR = Path(os.environ.get(
+    "TROCR_EXPORT_DIR",
+    Path(__file__).resolve().parent / "models" / "trocr-base-printed"
+))
+TROCR_MODEL_FILE = "model.safetensors"
+
+
+def main():
+    from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+
+    print(f"Loading {TROCR_MODEL_NAME}...")
+    processor = TrOCRProcessor.from_pretrained(TROCR_MODEL_NAME)
+    model = VisionEncoderDecoderModel.from_pretrained(TROCR_MODEL_NAME)
+    model.eval()
+
+    TROCR_EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    processor.save_pretrained(TROCR_EXPORT_DIR)
+    model.save_pretrained(TROCR_EXPORT_DIR, safe_serialization=True)
+
+    print(f"✓ TrOCR exported to: {TROCR_EXPORT_DIR}")
+
+
+if __name__ == "__main__":
+    main()
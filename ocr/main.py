@@ -2,21 +2,26 @@ from fastapi import FastAPI, File, UploadFile, HTTPException, Form
 from fastapi.responses import JSONResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 import json
-import shutil
+import hashlib
 from pathlib import Path
 import uuid
+from functools import lru_cache, wraps
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
-from ocr.preprocessing import preprocess_image
+from ocr.preprocessing import preprocess_for_tesseract
 from ocr.extractor import OCRExtractor
 from verification.comparator import DataComparator
 from utils.pdf_processing import PDFProcessor
 from utils.quality_score import QualityScorer
 from utils.vc_generator import VCGenerator
 from utils.qr_generator import QRGenerator
-from config import UPLOAD_DIR, OUTPUT_DIR, TEMP_DIR, ALLOWED_EXTENSIONS
+from config import UPLOAD_DIR, OUTPUT_DIR, TEMP_DIR, ALLOWED_EXTENSIONS, VC_PRIVATE_KEY_PATH, OCR_MAX_WORKERS, MAX_FILE_SIZE
 
 app = FastAPI(
     title="MOSIP OCR Verification System",
@@ -40,13 +45,53 @@ FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "..", "frontend")
 app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
 
 
-# Initialize components
-ocr_extractor = OCRExtractor()
-pdf_processor = PDFProcessor()
-quality_scorer = QualityScorer()
-data_comparator = DataComparator()
-vc_generator = VCGenerator()
-qr_generator = QRGenerator()
+# Components are created on first use, keeping worker startup cheap.
+# lru_cache does not lock on a miss, so construction is serialized here to
+# keep each component a true singleton when first called from worker threads
+_COMPONENT_LOCK = threading.RLock()
+
+
+def _component(factory):
+    """Cache a zero-argument factory's result, building it at most once"""
+    cached = lru_cache(maxsize=1)(factory)
+    
+    @wraps(factory)
+    def get():
+        with _COMPONENT_LOCK:
+            return cached()
+    
+    get.cache_clear = cached.cache_clear
+    return get
+
+
+@_component
+def get_ocr_extractor() -> OCRExtractor:
+    return OCRExtractor()
+
+
+@_component
+def get_pdf_processor() -> PDFProcessor:
+    return PDFProcessor()
+
+
+@_component
+def get_quality_scorer() -> QualityScorer:
+    return QualityScorer()
+
+
+@_component
+def get_data_comparator() -> DataComparator:
+    return DataComparator()
+
+
+@_component
+def get_vc_generator() -> VCGenerator:
+    return VCGenerator(private_key_path=VC_PRIVATE_KEY_PATH)
+
+
+@_component
+def get_qr_generator() -> QRGenerator:
+    return QRGenerator()
 
 
 class SubmittedData(BaseModel):
@@ -64,6 +109,36 @@ async def root():
     return FileResponse(os.path.join(FRONTEND_DIR, "index.html"))
 
 
+UPLOAD_CHUNK_SIZE = 1 << 16
+
+
+async def _save_upload(file: UploadFile, upload_path: Path) -> str:
+    """
+    Stream an upload to disk without blocking the event loop
+    
+    Oversized files are rejected as soon as MAX_FILE_SIZE is exceeded.
+    Returns the content hash used to key the preprocessing cache.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    size = 0
+    
+    out = await run_in_threadpool(open, upload_path, "wb")
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(413, f"File exceeds {MAX_FILE_SIZE // (1024 * 1024)}MB limit")
+            digest.update(chunk)
+            await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        await run_in_threadpool(out.close)
+        upload_path.unlink(missing_ok=True)
+        raise
+    
+    await run_in_threadpool(out.close)
+    return digest.hexdigest()
+
+
 
 @app.post("/api/extract")
 async def extract_text(
@@ -85,41 +160,64 @@ async def extract_text(
         file_id = str(uuid.uuid4())
         upload_path = UPLOAD_DIR / f"{file_id}{file_ext}"
         
-        with open(upload_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        content_key = await _save_upload(file, upload_path)
         
-        # Process PDF or image
+        # Process PDF or image (OCR only needs grayscale pages)
         if file_ext == '.pdf':
-            images = pdf_processor.convert_pdf_to_images(upload_path)
+            images = await run_in_threadpool(
+                get_pdf_processor().convert_pdf_to_images,
+                upload_path,
+                grayscale=True
+            )
         else:
             from PIL import Image
             images = [Image.open(upload_path)]
         
-        # Extract text from all pages
+        # Resolve shared components here, not lazily inside the workers
+        ocr_extractor = get_ocr_extractor()
+        quality_scorer = get_quality_scorer()
+        
+        def _process_page(page):
+            idx, image = page
+            
+            # Preprocess image (minimal for Tesseract)
+            preprocessed = preprocess_for_tesseract(
+                image,
+                cache_key=f"{content_key}:{idx}"
+            )
+            
+            # Quality scoring, reusing the statistics from preprocessing
+            quality_score = None
+            if include_quality_score:
+                quality_score = quality_scorer.score_from_stats(*preprocessed.stats)
+            
+            # OCR extraction
+            extracted_data, raw_text = ocr_extractor.extract_fields(
+                preprocessed.image,
+                use_handwritten=detect_handwritten
+            )
+            return quality_score, extracted_data, raw_text
+        
+        # Extract text from all pages; Tesseract runs outside the GIL so
+        # pages are OCR'd in parallel (map keeps page order)
+        def _process_all_pages():
+            max_workers = max(1, min(len(images), os.cpu_count() or 1, OCR_MAX_WORKERS))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                return list(executor.map(_process_page, enumerate(images)))
+        
+        # Run off the event loop so other requests are served meanwhile
+        page_results = await run_in_threadpool(_process_all_pages)
+        
         all_extracted_data = []
         all_raw_text = []
         quality_scores = []
         
-        for idx, image in enumerate(images):
-            # Quality scoring
+        for idx, (quality_score, extracted_data, raw_text) in enumerate(page_results):
             if include_quality_score:
-                quality_score = quality_scorer.score_image(image)
                 quality_scores.append({
                     "page": idx + 1,
                     **quality_score
                 })
-            
-            # Preprocess image (minimal for Tesseract)
-            from ocr.preprocessing import preprocess_for_tesseract
-            preprocessed = preprocess_for_tesseract(image)
-
-            
-            # OCR extraction
-            extracted_data, raw_text = ocr_extractor.extract_fields(
-                preprocessed,
-                use_handwritten=detect_handwritten
-            )
-            
             all_extracted_data.append({
                 "page": idx + 1,
                 "fields": extracted_data
@@ -145,6 +243,8 @@ async def extract_text(
         
         return JSONResponse(content=response)
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, f"Extraction failed: {str(e)}")
 
@@ -174,33 +274,47 @@ async def verify_data(
         file_id = str(uuid.uuid4())
         upload_path = UPLOAD_DIR / f"{file_id}{file_ext}"
         
-        with open(upload_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        content_key = await _save_upload(file, upload_path)
         
-        # Process document
+        # Process document (OCR only needs grayscale pages)
         if file_ext == '.pdf':
-            images = pdf_processor.convert_pdf_to_images(upload_path)
+            images = await run_in_threadpool(
+                get_pdf_processor().convert_pdf_to_images,
+                upload_path,
+                grayscale=True
+            )
         else:
             from PIL import Image
             images = [Image.open(upload_path)]
         
-        # Extract OCR data from first page
-        preprocessed = preprocess_image(images[0])
-        extracted_data, raw_text = ocr_extractor.extract_fields(preprocessed)
+        ocr_extractor = get_ocr_extractor()
+        
+        def _extract_first_page():
+            preprocessed = preprocess_for_tesseract(
+                images[0],
+                cache_key=f"{content_key}:0"
+            )
+            return ocr_extractor.extract_fields(preprocessed.image)
+        
+        # Extract OCR data from first page, off the event loop
+        extracted_data, raw_text = await run_in_threadpool(_extract_first_page)
         
         # Perform verification
-        verification_result = data_comparator.compare_data(
+        verification_result = get_data_comparator().compare_data(
             ocr_data=extracted_data,
             form_data=form_data
         )
         
         # Calculate overall score
-        field_scores = [
-            field["confidence"] 
-            for field in verification_result["fields"].values() 
-            if field.get("confidence") is not None
-        ]
-        overall_score = sum(field_scores) / len(field_scores) if field_scores else 0.0
+        field_scores = np.fromiter(
+            (
+                field["confidence"]
+                for field in verification_result["fields"].values()
+                if field.get("confidence") is not None
+            ),
+            dtype=np.float64
+        )
+        overall_score = float(field_scores.mean()) if field_scores.size else 0.0
         
         response = {
             "file_id": file_id,
@@ -234,11 +348,11 @@ async def generate_verifiable_credential(
         verified_fields = json.loads(verified_data)
         
         # Generate VC
-        vc = vc_generator.create_credential(verified_fields)
+        vc = get_vc_generator().create_credential(verified_fields)
         
         # Generate QR code
         qr_path = OUTPUT_DIR / f"{file_id}_qr.png"
-        qr_generator.generate_qr(vc, str(qr_path))
+        get_qr_generator().generate_qr(vc, str(qr_path))
         
         # Save VC JSON
         vc_path = OUTPUT_DIR / f"{file_id}_vc.json"
@@ -278,7 +392,7 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "ocr_model": ocr_extractor.model_name,
+        "ocr_model": get_ocr_extractor().model_name,
         "version": "1.0.0"
     }
 
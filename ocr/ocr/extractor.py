@@ -1,11 +1,39 @@
 from PIL import Image
 import pytesseract
-import cv2
-import numpy as np
 import re
+import queue
+import threading
 from typing import Tuple, Dict
 from datetime import datetime
 
+from config import USE_TESSEROCR
+from ocr.patterns import compile_pattern
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+
+# Field patterns, compiled once at import instead of on every OCR call
+# (RE2 when installed, see ocr.patterns)
+_NAME_RES = [
+    compile_pattern(r"(?:Applicant'?s?\s+)?(?:name|Name|NAME)[\s:]+([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)+)"),
+    compile_pattern(r"(?:Student|Candidate)[\s:]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)"),
+]
+_DOB_RE = compile_pattern(
+    r"(?:DOB|Date of Birth|Birth Date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
+    re.IGNORECASE
+)
+_EMAIL_RE = compile_pattern(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
+_PHONE_RE = compile_pattern(r"(?:Mobile|Phone|Tel)[\s/]*(?:No\.?)?[\s:]*(\d{10})")
+_GENDER_RE = compile_pattern(r"(?:Gender|Sex)[\s:]*\b(MALE|FEMALE|Male|Female)\b")
+_ADDRESS_RE = compile_pattern(
+    r"(?:Address|ADDRESS)[\s:]+(.+?)(?=\n(?:PIN|Email|Phone|$))",
+    re.IGNORECASE | re.DOTALL
+)
+
 
 class OCRExtractor:
     def __init__(self, model_name: str = "microsoft/trocr-base-printed"):
@@ -15,78 +43,142 @@ class OCRExtractor:
         self.trocr_processor = None
         self.trocr_model = None
         self.device = None
+        self._trocr_lock = threading.Lock()
+        # Idle tesserocr engines, reused across pages and requests
+        self._tesserocr_pool = queue.SimpleQueue()
+        self.use_tesserocr = USE_TESSEROCR and TESSEROCR_AVAILABLE
         
         print("OCR Extractor initialized")
-        print("✓ Tesseract OCR ready (default for printed text)")
+        if USE_TESSEROCR and not TESSEROCR_AVAILABLE:
+            print("⚠️ USE_TESSEROCR set but tesserocr is not installed, using pytesseract")
+        print(f"✓ Tesseract OCR ready via {'tesserocr' if self.use_tesserocr else 'pytesseract'} (default for printed text)")
         print("✓ TrOCR will load on-demand for handwritten text")
     
     def _load_trocr(self):
         """Lazy load TrOCR only when needed"""
-        if self.trocr_loaded:
-            return
+        # Pages may be processed concurrently, load the model only once
+        with self._trocr_lock:
+            if self.trocr_loaded:
+                return
+            
+            try:
+                print("Loading TrOCR model for handwritten text...")
+                from transformers import TrOCRProcessor, VisionEncoderDecoderModel
+                import torch
+                
+                self.device = "cuda" if torch.cuda.is_available() else "cpu"
+                self.trocr_processor = TrOCRProcessor.from_pretrained(self.model_name)
+                self.trocr_model = VisionEncoderDecoderModel.from_pretrained(self.model_name)
+                self.trocr_model.to(self.device)
+                self.trocr_model.eval()
+                # Inference only: no parameter needs autograd tracking
+                self.trocr_model.requires_grad_(False)
+                self.trocr_loaded = True
+                print(f"✓ TrOCR loaded on {self.device}")
+            except Exception as e:
+                print(f"❌ Failed to load TrOCR: {e}")
+    
+    def extract_text_tesseract(self, image: Image.Image) -> str:
+        """Extract text using Tesseract OCR"""
+        if self.use_tesserocr:
+            return self._extract_text_tesserocr(image)
         
         try:
-            print("Loading TrOCR model for handwritten text...")
-            from transformers import TrOCRProcessor, VisionEncoderDecoderModel
-            import torch
+            # Configure Tesseract
+            config = r'--oem 3 --psm 6'
+            text = self._tesseract_lines(image, config)
+            
+            # If empty, try different PSM
+            if not text:
+                print("   Trying PSM 3...")
+                config = r'--oem 3 --psm 3'
+                text = self._tesseract_lines(image, config)
             
-            self.device = "cuda" if torch.cuda.is_available() else "cpu"
-            self.trocr_processor = TrOCRProcessor.from_pretrained(self.model_name)
-            self.trocr_model = VisionEncoderDecoderModel.from_pretrained(self.model_name)
-            self.trocr_model.to(self.device)
-            self.trocr_model.eval()
-            self.trocr_loaded = True
-            print(f"✓ TrOCR loaded on {self.device}")
+            return text
         except Exception as e:
-            print(f"❌ Failed to load TrOCR: {e}")
+            print(f"❌ Tesseract error: {e}")
+            return ""
     
-    def _preprocess_for_tesseract(self, image: Image.Image) -> Image.Image:
+    def _extract_text_tesserocr(self, image: Image.Image) -> str:
         """
-        Minimal preprocessing for Tesseract
+        Extract text with in-process libtesseract bindings
         
-        Tesseract has built-in preprocessing, so we keep it light
+        Skips the PNG temp file and tesseract subprocess pytesseract needs
+        per call; engines are pooled so the LSTM model loads once each.
+        Output is filtered and rebuilt exactly like _tesseract_lines
         """
-        # Convert to RGB
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Convert to numpy
-        img_array = np.array(image)
-        gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        
-        # Check quality
-        blur_score = cv2.Laplacian(gray, cv2.CV_64F).var()
-        
-        # Light denoising only
-        if blur_score < 500:
-            denoised = cv2.fastNlMeansDenoising(gray, None, h=10, templateWindowSize=7, searchWindowSize=21)
-        else:
-            denoised = gray
-        
-        # Convert back to RGB
-        rgb = cv2.cvtColor(denoised, cv2.COLOR_GRAY2RGB)
-        return Image.fromarray(rgb)
-    
-    def extract_text_tesseract(self, image: Image.Image) -> str:
-        """Extract text using Tesseract OCR"""
+        api = None
         try:
-            # Minimal preprocessing
-            processed = self._preprocess_for_tesseract(image)
+            try:
+                api = self._tesserocr_pool.get_nowait()
+            except queue.Empty:
+                api = tesserocr.PyTessBaseAPI(
+                    lang='eng',
+                    psm=tesserocr.PSM.SINGLE_BLOCK,
+                    oem=tesserocr.OEM.DEFAULT
+                )
             
-            # Configure Tesseract
-            config = r'--oem 3 --psm 6'
-            text = pytesseract.image_to_string(processed, config=config, lang='eng')
+            text = self._tesserocr_lines(api, image, tesserocr.PSM.SINGLE_BLOCK)
             
             # If empty, try different PSM
-            if not text.strip():
+            if not text:
                 print("   Trying PSM 3...")
-                config = r'--oem 3 --psm 3'
-                text = pytesseract.image_to_string(processed, config=config, lang='eng')
+                text = self._tesserocr_lines(api, image, tesserocr.PSM.AUTO)
             
-            return text.strip()
+            return text
         except Exception as e:
             print(f"❌ Tesseract error: {e}")
             return ""
+        finally:
+            if api is not None:
+                self._tesserocr_pool.put(api)
+    
+    @staticmethod
+    def _tesserocr_lines(api, image: Image.Image, psm) -> str:
+        """
+        Recognize with a tesserocr engine and rebuild the text line by line
+        
+        Same rules as _tesseract_lines: words without a positive
+        confidence are dropped, lines left empty disappear
+        """
+        api.SetPageSegMode(psm)
+        api.SetImage(image)
+        api.Recognize()
+        
+        level = tesserocr.RIL.WORD
+        lines = []
+        for word_iter in tesserocr.iterate_level(api.GetIterator(), level):
+            if not lines or word_iter.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                lines.append([])
+            word = word_iter.GetUTF8Text(level)
+            if not word or not word.strip() or word_iter.Confidence(level) <= 0:
+                continue
+            lines[-1].append(word)
+        
+        return "\n".join(" ".join(words) for words in lines if words).strip()
+    
+    @staticmethod
+    def _tesseract_lines(image: Image.Image, config: str) -> str:
+        """
+        Run Tesseract once via image_to_data and rebuild the text line by line
+        
+        Boxes without a positive confidence (layout rows, noise) are dropped
+        """
+        data = pytesseract.image_to_data(
+            image,
+            config=config,
+            lang='eng',
+            output_type=pytesseract.Output.DICT
+        )
+        
+        lines = {}
+        for i, word in enumerate(data["text"]):
+            if not word.strip() or float(data["conf"][i]) <= 0:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            lines.setdefault(key, []).append(word)
+        
+        return "\n".join(" ".join(words) for words in lines.values()).strip()
     
     def extract_text_trocr(self, image: Image.Image) -> str:
         """Extract text using TrOCR (for handwritten)"""
@@ -99,12 +191,18 @@ class OCRExtractor:
         try:
             import torch
             
-            pixel_values = self.trocr_processor(
-                images=image,
-                return_tensors="pt"
-            ).pixel_values.to(self.device)
+            # Preprocessed pages are grayscale, TrOCR expects 3 channels
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
             
-            with torch.no_grad():
+            # inference_mode skips autograd bookkeeping for the tensors the
+            # processor creates as well as for generate()
+            with torch.inference_mode():
+                pixel_values = self.trocr_processor(
+                    images=image,
+                    return_tensors="pt"
+                ).pixel_values.to(self.device)
+                
                 generated_ids = self.trocr_model.generate(
                     pixel_values,
                     max_new_tokens=100
@@ -134,7 +232,12 @@ class OCRExtractor:
         image: Image.Image,
         use_handwritten: bool = False
     ) -> Tuple[Dict, str]:
-        """Extract structured fields from document"""
+        """
+        Extract structured fields from document
+        
+        The image is expected to be preprocessed already
+        (see ocr.preprocessing.preprocess_for_tesseract)
+        """
         print("=" * 80)
         print(f"🔍 OCR Mode: {'TrOCR (Handwritten)' if use_handwritten else 'Tesseract (Printed)'}")
         
@@ -173,12 +276,8 @@ class OCRExtractor:
         fields = {}
         
         # Name
-        name_patterns = [
-            r"(?:Applicant'?s?\s+)?(?:name|Name|NAME)[\s:]+([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)+)",
-            r"(?:Student|Candidate)[\s:]+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)",
-        ]
-        for pattern in name_patterns:
-            match = re.search(pattern, text)
+        for name_re in _NAME_RES:
+            match = name_re.search(text)
             if match:
                 name = match.group(1).strip()
                 if 5 <= len(name) <= 50 and len(name.split()) >= 2:
@@ -186,41 +285,27 @@ class OCRExtractor:
                     break
         
         # DOB
-        dob_patterns = [
-            r"(?:DOB|Date of Birth|Birth Date)[\s:]*(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})",
-        ]
-        for pattern in dob_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                fields["dob"] = self._normalize_date(match.group(1))
-                break
+        match = _DOB_RE.search(text)
+        if match:
+            fields["dob"] = self._normalize_date(match.group(1))
         
         # Email
-        email_match = re.search(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b", text)
+        email_match = _EMAIL_RE.search(text)
         if email_match:
             fields["email"] = email_match.group(0)
         
         # Phone
-        phone_patterns = [
-            r"(?:Mobile|Phone|Tel)[\s/]*(?:No\.?)?[\s:]*(\d{10})",
-        ]
-        for pattern in phone_patterns:
-            match = re.search(pattern, text)
-            if match:
-                fields["phone"] = match.group(1)
-                break
+        match = _PHONE_RE.search(text)
+        if match:
+            fields["phone"] = match.group(1)
         
         # Gender
-        gender_match = re.search(r"(?:Gender|Sex)[\s:]*\b(MALE|FEMALE|Male|Female)\b", text)
+        gender_match = _GENDER_RE.search(text)
         if gender_match:
             fields["gender"] = gender_match.group(1).capitalize()
         
         # Address
-        address_match = re.search(
-            r"(?:Address|ADDRESS)[\s:]+(.+?)(?=\n(?:PIN|Email|Phone|$))",
-            text,
-            re.IGNORECASE | re.DOTALL
-        )
+        address_match = _ADDRESS_RE.search(text)
         if address_match:
             address = " ".join(address_match.group(1).split())
             if 15 <= len(address) <= 300:
@@ -1,45 +1,64 @@
 import re
 from typing import Dict, Optional
 
+from ocr.patterns import compile_pattern
+
+
+_AADHAAR_RE = compile_pattern(r"\b\d{4}\s?\d{4}\s?\d{4}\b")
+_PAN_RE = compile_pattern(r"\b[A-Z]{5}\d{4}[A-Z]\b")
+_PINCODE_RE = compile_pattern(r"\b\d{6}\b")
+
+_INDIAN_STATES = [
+    "Maharashtra", "Delhi", "Karnataka", "Tamil Nadu",
+    "Uttar Pradesh", "Gujarat", "Rajasthan", "Kerala"
+]
+# One alternation scanned in a single pass instead of a substring test per state
+_STATE_RE = compile_pattern(
+    r"\b(" + "|".join(map(re.escape, _INDIAN_STATES)) + r")\b",
+    re.IGNORECASE
+)
+_STATE_CANONICAL = {state.lower(): state for state in _INDIAN_STATES}
+# Lowercase stems of every state; addresses containing none skip the regex
+_STATE_STEMS = frozenset(state.lower()[:5] for state in _INDIAN_STATES)
+
 
 class FieldParser:
     """Advanced field parsing with context awareness"""
-    
+
     @staticmethod
     def parse_indian_documents(text: str) -> Dict:
         """Parse India-specific documents (Aadhaar, PAN, etc.)"""
         fields = {}
-        
+
         # Aadhaar number
-        aadhaar = re.search(r"\b\d{4}\s?\d{4}\s?\d{4}\b", text)
+        aadhaar = _AADHAAR_RE.search(text)
         if aadhaar:
             fields["aadhaar"] = aadhaar.group(0).replace(" ", "")
-        
+
         # PAN number
-        pan = re.search(r"\b[A-Z]{5}\d{4}[A-Z]\b", text)
+        pan = _PAN_RE.search(text)
         if pan:
             fields["pan"] = pan.group(0)
-        
+
         return fields
-    
+
     @staticmethod
     def parse_address_components(address: str) -> Dict:
         """Parse address into components"""
         components = {}
-        
+
         # Pincode
-        pincode = re.search(r"\b\d{6}\b", address)
+        pincode = _PINCODE_RE.search(address)
         if pincode:
             components["pincode"] = pincode.group(0)
-        
+
         # State
-        indian_states = [
-            "Maharashtra", "Delhi", "Karnataka", "Tamil Nadu",
-            "Uttar Pradesh", "Gujarat", "Rajasthan", "Kerala"
-        ]
-        for state in indian_states:
-            if state.lower() in address.lower():
-                components["state"] = state
-                break
+        address_lc = address.lower()
+        if not any(stem in address_lc for stem in _STATE_STEMS):
+            return components
         
+        state = _STATE_RE.search(address)
+        if state:
+            components["state"] = _STATE_CANONICAL[state.group(1).lower()]
+
         return components
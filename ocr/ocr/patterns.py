@@ -0,0 +1,33 @@
+import re
+
+try:
+    import re2
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False
+    RE2_AVAILABLE = True
+except (ImportError, AttributeError):
+    RE2_AVAILABLE = False
+
+# re flags expressed as inline RE2 flags
+_INLINE_FLAGS = (
+    (re.IGNORECASE, "i"),
+    (re.DOTALL, "s"),
+    (re.MULTILINE, "m"),
+)
+
+
+def compile_pattern(pattern: str, flags: int = 0):
+    """
+    Compile a field pattern with RE2 when available, else with re
+
+    RE2 (google-re2) matches in linear time without backtracking, which
+    bounds the cost of scanning long OCR output. Patterns RE2 rejects
+    (lookarounds, backreferences) fall back to re individually.
+    """
+    if RE2_AVAILABLE:
+        inline = "".join(char for flag, char in _INLINE_FLAGS if flags & flag)
+        try:
+            return re2.compile(f"(?{inline}){pattern}" if inline else pattern, _RE2_OPTIONS)
+        except re2.error:
+            pass
+    return re.compile(pattern, flags)
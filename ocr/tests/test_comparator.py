@@ -0,0 +1,35 @@
+from verification.comparator import DataComparator
+
+
+def _assert_parity(ocr_records, form_records):
+    comparator = DataComparator()
+    batch = comparator.compare_batch(ocr_records, form_records)
+    
+    for i, ocr_record in enumerate(ocr_records):
+        for j, form_record in enumerate(form_records):
+            single = comparator.compare_data(ocr_record, form_record)["fields"]
+            for field, expected in single.items():
+                scores = batch["fields"][field]
+                assert scores["match"][i][j] == expected["match"], (field, i, j)
+                assert scores["confidence"][i][j] == expected["confidence"], (field, i, j)
+
+
+def test_int_and_float_match_within_tolerance():
+    batch = DataComparator().compare_batch([{"age": 5}], [{"age": 5.0}])
+    
+    assert batch["fields"]["age"]["match"] == [[True]]
+    assert batch["fields"]["age"]["confidence"] == [[1.0]]
+
+
+def test_batch_matches_compare_data():
+    ocr_records = [
+        {"name": "John Smith", "age": 5, "score": "7.004", "dob": "1990-01-15"},
+        {"name": "Jane Doe", "age": "five", "score": 7, "dob": "15/01/1990"},
+        {"name": "J. Smith", "age": 30.004, "dob": "not a date"},
+    ]
+    form_records = [
+        {"name": "John Smith", "age": 5.0, "score": 7, "dob": "15/01/1990"},
+        {"name": "Jane Doe", "age": "30", "score": "7", "dob": "1990-01-16"},
+    ]
+    
+    _assert_parity(ocr_records, form_records)
@@ -0,0 +1,41 @@
+import cv2
+import numpy as np
+from PIL import Image
+
+import standalone_ocr_test
+
+
+def _a4_page(lines: int) -> Image.Image:
+    """Synthetic 200 DPI A4 page with `lines` printed text lines"""
+    page = np.full((2339, 1654), 255, np.uint8)
+    for i in range(lines):
+        cv2.putText(
+            page, "Name: Ravi Kumar  DOB 01/01/1990", (150, 300 + i * 80),
+            cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 2
+        )
+    return Image.fromarray(page).convert("RGB")
+
+
+def _run(tmp_path, monkeypatch, image):
+    image.save(tmp_path / "page.png")
+    monkeypatch.setattr(standalone_ocr_test, "OCR_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(standalone_ocr_test, "ocr_with_tesseract", lambda page: "Name: Ravi Kumar")
+    ocr = standalone_ocr_test.StandaloneOCR.__new__(standalone_ocr_test.StandaloneOCR)
+    ocr.device = None
+    return ocr.test_document(tmp_path / "page.png")["pages"][0]
+
+
+def test_one_line_page_is_ocrd(tmp_path, monkeypatch):
+    page = _run(tmp_path, monkeypatch, _a4_page(1))
+
+    # Low global contrast alone must not skip a page with text on it
+    assert page["quality"]["contrast"] < 10
+    assert "skipped" not in page["tesseract_ocr"]
+    assert page["tesseract_ocr"]["text"] == "Name: Ravi Kumar"
+
+
+def test_empty_page_is_skipped(tmp_path, monkeypatch):
+    page = _run(tmp_path, monkeypatch, _a4_page(0))
+
+    assert page["tesseract_ocr"]["skipped"] == "low_quality"
+    assert page["trocr_ocr"]["text"] == ""
@@ -2,8 +2,56 @@ import qrcode
 from PIL import Image
 import json
 from typing import Dict
-import gzip
-import base64
+import zlib
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# RFC 9285 base45 alphabet: exactly the QR alphanumeric character set, so
+# the payload is encoded at 5.5 bits per character instead of byte mode's 8
+_B45_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_B45_INDEX = {char: value for value, char in enumerate(_B45_ALPHABET)}
+
+
+def _b45encode(data: bytes) -> str:
+    """Base45-encode bytes (two bytes -> three characters)"""
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        value = (data[i] << 8) | data[i + 1]
+        value, c = divmod(value, 45)
+        e, d = divmod(value, 45)
+        chars += (_B45_ALPHABET[c], _B45_ALPHABET[d], _B45_ALPHABET[e])
+    if len(data) % 2:
+        d, c = divmod(data[-1], 45)
+        chars += (_B45_ALPHABET[c], _B45_ALPHABET[d])
+    return "".join(chars)
+
+
+def _b45decode(text: str) -> bytes:
+    """Decode a base45 string produced by _b45encode"""
+    try:
+        values = [_B45_INDEX[char] for char in text]
+    except KeyError as e:
+        raise ValueError(f"Invalid base45 character: {e}")
+    if len(values) % 3 == 1:
+        raise ValueError("Invalid base45 length")
+    
+    out = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        value = sum(v * 45 ** k for k, v in enumerate(chunk))
+        if len(chunk) == 3:
+            if value > 0xFFFF:
+                raise ValueError("Invalid base45 chunk")
+            out += value.to_bytes(2, "big")
+        else:
+            if value > 0xFF:
+                raise ValueError("Invalid base45 chunk")
+            out.append(value)
+    return bytes(out)
 
 
 class QRGenerator:
@@ -13,13 +61,12 @@ class QRGenerator:
         self.box_size = box_size
         self.border = border
     
-    def generate_qr(self, vc_data: Dict, output_path: str) -> None:
+    def make_qr_image(self, vc_data: Dict) -> Image.Image:
         """
-        Generate QR code from VC data and save to file
+        Build the QR code for VC data as an in-memory PIL image
         
         Args:
             vc_data: Verifiable Credential dictionary
-            output_path: Path to save QR code image
         """
         # Compress VC data
         compressed_data = self._compress_vc(vc_data)
@@ -36,8 +83,17 @@ class QRGenerator:
         qr.make(fit=True)
         
         # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        img.save(output_path)
+        return qr.make_image(fill_color="black", back_color="white").get_image()
+    
+    def generate_qr(self, vc_data: Dict, output_path: str) -> None:
+        """
+        Generate QR code from VC data and save to file
+        
+        Args:
+            vc_data: Verifiable Credential dictionary
+            output_path: Path to save QR code image
+        """
+        self.make_qr_image(vc_data).save(output_path)
     
     def generate_qr_with_logo(
         self,
@@ -45,52 +101,57 @@ class QRGenerator:
         output_path: str,
         logo_path: str = None
     ) -> None:
-        """Generate QR code with embedded logo"""
+        """Generate QR code with embedded logo (composited in memory, saved once)"""
         # Generate base QR
-        self.generate_qr(vc_data, output_path)
+        qr_img = self.make_qr_image(vc_data)
         
         if logo_path:
-            # Open QR and logo
-            qr_img = Image.open(output_path)
             logo = Image.open(logo_path)
             
             # Calculate logo size (10% of QR size)
             qr_width, qr_height = qr_img.size
             logo_size = qr_width // 10
             
-            # Resize logo
-            logo = logo.resize((logo_size, logo_size), Image.LANCZOS)
+            # Shrink logo in place (keeps aspect ratio, decodes at reduced scale)
+            logo.thumbnail((logo_size, logo_size), Image.LANCZOS)
             
             # Calculate position (center)
-            logo_pos = ((qr_width - logo_size) // 2, (qr_height - logo_size) // 2)
+            logo_pos = ((qr_width - logo.width) // 2, (qr_height - logo.height) // 2)
             
             # Paste logo
             qr_img.paste(logo, logo_pos)
-            qr_img.save(output_path)
+        
+        qr_img.save(output_path)
     
     def _compress_vc(self, vc_data: Dict) -> str:
-        """Compress VC data for QR code"""
-        # Convert to JSON
-        json_str = json.dumps(vc_data, separators=(',', ':'))
+        """
+        Compress VC data for QR code
         
-        # Compress
-        compressed = gzip.compress(json_str.encode('utf-8'))
+        zlib + base45, as in the EU Digital COVID Certificate; base45 output
+        lets qrcode use alphanumeric mode and a smaller symbol version
+        """
+        # Convert to compact UTF-8 JSON
+        if ORJSON_AVAILABLE:
+            json_bytes = orjson.dumps(vc_data)
+        else:
+            json_bytes = json.dumps(vc_data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
         
-        # Base64 encode
-        encoded = base64.b64encode(compressed).decode('utf-8')
+        # Compress
+        compressed = zlib.compress(json_bytes, 9)
         
-        return encoded
+        # Base45 encode
+        return _b45encode(compressed)
     
     @staticmethod
     def decompress_vc(compressed_data: str) -> Dict:
         """Decompress VC data from QR code"""
-        # Base64 decode
-        decoded = base64.b64decode(compressed_data)
+        # Base45 decode
+        decoded = _b45decode(compressed_data)
         
         # Decompress
-        decompressed = gzip.decompress(decoded)
+        decompressed = zlib.decompress(decoded)
         
         # Parse JSON
-        vc_data = json.loads(decompressed.decode('utf-8'))
+        vc_data = orjson.loads(decompressed) if ORJSON_AVAILABLE else json.loads(decompressed)
         
         return vc_data
@@ -1,20 +1,81 @@
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from pathlib import Path
 from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import serialization
 import base64
 import hashlib
+import os
+import time
+import uuid
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def _subject_id_for_items(items: tuple) -> str:
+    """SHA-256 subject ID for sorted (key, type name, value) triples"""
+    data_str = json.dumps({key: value for key, _, value in items}, sort_keys=True)
+    hash_obj = hashlib.sha256(data_str.encode(), usedforsecurity=False)
+    return hash_obj.hexdigest()[:16]
 
 
 class VCGenerator:
     """Generate W3C Verifiable Credentials"""
     
-    def __init__(self, issuer_did: str = "did:key:z6MkpTHR8VNsBxYAAWHut2Geadd9jSwuBV8xRoAnwWsdvktH"):
+    def __init__(
+        self,
+        issuer_did: str = "did:key:z6MkpTHR8VNsBxYAAWHut2Geadd9jSwuBV8xRoAnwWsdvktH",
+        private_key_path: Optional[Path] = None
+    ):
         self.issuer_did = issuer_did
-        # Generate signing key (in production, load from secure storage)
-        self.private_key = ed25519.Ed25519PrivateKey.generate()
+        # Signing key is persisted so credentials stay verifiable across restarts
+        if private_key_path is not None:
+            self.private_key = self._load_or_create_key(Path(private_key_path))
+        else:
+            self.private_key = ed25519.Ed25519PrivateKey.generate()
         self.public_key = self.private_key.public_key()
+        
+        # Public key never changes, encode it once for every proof
+        public_key_bytes = self.public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        self._public_key_b64 = base64.b64encode(public_key_bytes).decode('utf-8')
+    
+    @staticmethod
+    def _load_or_create_key(key_path: Path) -> ed25519.Ed25519PrivateKey:
+        """
+        Load raw Ed25519 private key from disk, generating it if missing
+        
+        The key file is created exclusively with mode 0600, so it is never
+        readable by others and concurrent workers all end up with the key
+        written by whichever one created it first
+        """
+        key_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            return VCGenerator._read_key(key_path)
+        
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        with os.fdopen(fd, "wb") as f:
+            f.write(private_key.private_bytes(
+                encoding=serialization.Encoding.Raw,
+                format=serialization.PrivateFormat.Raw,
+                encryption_algorithm=serialization.NoEncryption()
+            ))
+        return private_key
+    
+    @staticmethod
+    def _read_key(key_path: Path, attempts: int = 50) -> ed25519.Ed25519PrivateKey:
+        """Read an existing key file, waiting briefly if another worker is still writing it"""
+        for _ in range(attempts):
+            key_bytes = key_path.read_bytes()
+            if len(key_bytes) >= 32:
+                return ed25519.Ed25519PrivateKey.from_private_bytes(key_bytes)
+            time.sleep(0.1)
+        raise RuntimeError(f"Signing key file is incomplete: {key_path}")
     
     def create_credential(self, verified_data: Dict[str, Any]) -> Dict:
         """
@@ -83,42 +144,51 @@ class VCGenerator:
         
         Uses Ed25519 signature
         """
-        # Create canonical form (simplified)
-        credential_copy = credential.copy()
-        canonical = json.dumps(credential_copy, sort_keys=True, separators=(',', ':'))
-        
-        # Sign
-        signature = self.private_key.sign(canonical.encode('utf-8'))
+        # Sign the digest of the canonical form
+        signature = self.private_key.sign(self._signing_digest(credential))
         signature_b64 = base64.b64encode(signature).decode('utf-8')
         
-        # Public key for verification
-        public_key_bytes = self.public_key.public_bytes(
-            encoding=serialization.Encoding.Raw,
-            format=serialization.PublicFormat.Raw
-        )
-        public_key_b64 = base64.b64encode(public_key_bytes).decode('utf-8')
-        
         proof = {
             "type": "Ed25519Signature2020",
             "created": datetime.utcnow().isoformat() + "Z",
             "verificationMethod": f"{self.issuer_did}#keys-1",
             "proofPurpose": "assertionMethod",
             "proofValue": signature_b64,
-            "publicKey": public_key_b64
+            "publicKey": self._public_key_b64
         }
         
         return proof
     
+    @staticmethod
+    def _signing_digest(credential: Dict) -> bytes:
+        """
+        Canonicalize credential (JCS-style: sorted keys, no whitespace,
+        UTF-8) and pre-hash it to 32 bytes with BLAKE2b
+        """
+        canonical = json.dumps(
+            credential,
+            sort_keys=True,
+            separators=(',', ':'),
+            ensure_ascii=False
+        )
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=32).digest()
+    
     def _generate_credential_id(self) -> str:
         """Generate unique credential ID"""
-        import uuid
         return str(uuid.uuid4())
     
     def _generate_subject_id(self, data: Dict) -> str:
         """Generate deterministic subject ID from data"""
-        data_str = json.dumps(data, sort_keys=True)
-        hash_obj = hashlib.sha256(data_str.encode())
-        return hash_obj.hexdigest()[:16]
+        # Type names keep 1 / 1.0 / True from sharing a cache entry
+        try:
+            return _subject_id_for_items(tuple(sorted(
+                (key, type(value).__name__, value) for key, value in data.items()
+            )))
+        except TypeError:
+            # Nested (unhashable) values bypass the cache
+            data_str = json.dumps(data, sort_keys=True)
+            hash_obj = hashlib.sha256(data_str.encode(), usedforsecurity=False)
+            return hash_obj.hexdigest()[:16]
     
     def verify_credential(self, credential: Dict) -> bool:
         """
@@ -134,13 +204,12 @@ class VCGenerator:
             if not signature_b64:
                 return False
             
-            # Recreate canonical form
+            # Recreate canonical digest
             credential_copy = {k: v for k, v in credential.items() if k != "proof"}
-            canonical = json.dumps(credential_copy, sort_keys=True, separators=(',', ':'))
             
             # Verify signature
             signature = base64.b64decode(signature_b64)
-            self.public_key.verify(signature, canonical.encode('utf-8'))
+            self.public_key.verify(signature, self._signing_digest(credential_copy))
             
             return True
         except Exception:
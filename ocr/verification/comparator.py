@@ -1,14 +1,28 @@
-from rapidfuzz import fuzz
-from typing import Dict, Any
+from rapidfuzz import fuzz, process
+from typing import Dict, Any, List, Optional
 import re
+import numpy as np
 from datetime import datetime
 
 
+_RE_PUNCT = re.compile(r"[^\w\s]")
+_RE_PHONE = re.compile(r"[^\d+]")
+_RE_WS = re.compile(r"\s+")
+
+_DATE_FIELDS = frozenset({"dob", "date", "date_of_birth"})
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y")
+# "%m/%d/%Y" is only reached after "%d/%m/%Y" fails; remembering it per
+# field would make it shadow the day-first reading of later values
+_UNCACHED_DATE_FORMATS = frozenset({"%m/%d/%Y"})
+
+
 class DataComparator:
     """Compare OCR-extracted data with user-submitted form data"""
     
     def __init__(self, fuzzy_threshold: int = 85):
         self.fuzzy_threshold = fuzzy_threshold
+        # Last strptime format that parsed each date field, tried first next time
+        self._field_date_fmt: Dict[str, str] = {}
     
     def compare_data(
         self,
@@ -50,6 +64,169 @@ class DataComparator:
         
         return result
     
+    def compare_batch(
+        self,
+        ocr_records: List[Dict[str, Any]],
+        form_records: List[Dict[str, Any]]
+    ) -> Dict:
+        """
+        Compare every OCR record against every form record
+        
+        Each field is scored as one rapidfuzz cdist call over the normalized
+        values (native code, all cores) instead of a Python loop of
+        fuzz.ratio calls. Date fields are compared as dates and numeric
+        values within compare_data's 0.01 tolerance, so both methods agree
+        on every pair. Returns per-field
+        [len(ocr), len(form)] matrices of confidence (0-1) and match flags;
+        missing values never match.
+        """
+        result = {"fields": {}}
+        
+        all_fields = set().union(*ocr_records, *form_records)
+        
+        for field in sorted(all_fields):
+            ocr_values = [self._normalize_value(record.get(field), field) for record in ocr_records]
+            form_values = [self._normalize_value(record.get(field), field) for record in form_records]
+            
+            similarity = process.cdist(
+                ocr_values,
+                form_values,
+                scorer=fuzz.ratio,
+                dtype=np.float64,
+                workers=-1
+            )
+            match = similarity >= self.fuzzy_threshold
+            
+            if field in _DATE_FIELDS:
+                similarity, match = self._date_matrices(
+                    field,
+                    ocr_records,
+                    form_records,
+                    ocr_values,
+                    form_values,
+                    similarity
+                )
+            else:
+                similarity, match = self._numeric_matrices(
+                    field,
+                    ocr_records,
+                    form_records,
+                    similarity,
+                    match
+                )
+            
+            # Missing on either side scores 0, as in compare_data
+            ocr_missing = np.fromiter(
+                (record.get(field) is None for record in ocr_records),
+                dtype=bool,
+                count=len(ocr_records)
+            )
+            form_missing = np.fromiter(
+                (record.get(field) is None for record in form_records),
+                dtype=bool,
+                count=len(form_records)
+            )
+            similarity[ocr_missing, :] = 0.0
+            similarity[:, form_missing] = 0.0
+            match[ocr_missing, :] = False
+            match[:, form_missing] = False
+            
+            result["fields"][field] = {
+                "confidence": np.round(similarity / 100.0, 3).tolist(),
+                "match": match.tolist()
+            }
+        
+        return result
+    
+    def _date_matrices(
+        self,
+        field: str,
+        ocr_records: List[Dict[str, Any]],
+        form_records: List[Dict[str, Any]],
+        ocr_values: List[str],
+        form_values: List[str],
+        similarity: np.ndarray
+    ):
+        """
+        Batch counterpart of _compare_dates
+        
+        Pairs where both sides parse compare as dates (100 or 0); the rest
+        keep the fuzzy score but only match on identical normalized text
+        """
+        ocr_dates = np.array(
+            [self._parse_date(record[field], field) if record.get(field) is not None else None
+             for record in ocr_records],
+            dtype=object
+        )
+        form_dates = np.array(
+            [self._parse_date(record[field], field) if record.get(field) is not None else None
+             for record in form_records],
+            dtype=object
+        )
+        ocr_parsed = np.fromiter((date is not None for date in ocr_dates), dtype=bool, count=len(ocr_dates))
+        form_parsed = np.fromiter((date is not None for date in form_dates), dtype=bool, count=len(form_dates))
+        both_parsed = ocr_parsed[:, None] & form_parsed[None, :]
+        same_date = ocr_dates[:, None] == form_dates[None, :]
+        same_text = np.array(ocr_values, dtype=object)[:, None] == np.array(form_values, dtype=object)[None, :]
+        
+        similarity = np.where(both_parsed, np.where(same_date, 100.0, 0.0), similarity)
+        match = np.where(both_parsed, same_date, same_text).astype(bool)
+        return similarity, match
+    
+    def _numeric_matrices(
+        self,
+        field: str,
+        ocr_records: List[Dict[str, Any]],
+        form_records: List[Dict[str, Any]],
+        similarity: np.ndarray,
+        match: np.ndarray
+    ):
+        """
+        Batch counterpart of _compare_numeric
+        
+        Pairs where either side is an int/float compare as numbers (100 or
+        0); values that do not convert to float never match
+        """
+        ocr_numeric = np.fromiter(
+            (isinstance(record.get(field), (int, float)) for record in ocr_records),
+            dtype=bool,
+            count=len(ocr_records)
+        )
+        form_numeric = np.fromiter(
+            (isinstance(record.get(field), (int, float)) for record in form_records),
+            dtype=bool,
+            count=len(form_records)
+        )
+        if not (ocr_numeric.any() or form_numeric.any()):
+            return similarity, match
+        
+        ocr_nums = np.fromiter(
+            (self._to_float(record.get(field)) for record in ocr_records),
+            dtype=np.float64,
+            count=len(ocr_records)
+        )
+        form_nums = np.fromiter(
+            (self._to_float(record.get(field)) for record in form_records),
+            dtype=np.float64,
+            count=len(form_records)
+        )
+        numeric_pair = ocr_numeric[:, None] | form_numeric[None, :]
+        # NaN (unconvertible) never compares below the tolerance
+        with np.errstate(invalid="ignore"):
+            close = np.abs(ocr_nums[:, None] - form_nums[None, :]) < 0.01
+        
+        similarity = np.where(numeric_pair, np.where(close, 100.0, 0.0), similarity)
+        match = np.where(numeric_pair, close, match)
+        return similarity, match
+    
+    @staticmethod
+    def _to_float(value: Any) -> float:
+        """float(value), or NaN where _compare_numeric would fail"""
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return np.nan
+    
     def _compare_field(
         self,
         field_name: str,
@@ -63,8 +240,8 @@ class DataComparator:
         form_norm = self._normalize_value(form_value, field_name)
         
         # Date comparison
-        if field_name in ["dob", "date", "date_of_birth"]:
-            return self._compare_dates(ocr_norm, form_norm, ocr_value, form_value)
+        if field_name in _DATE_FIELDS:
+            return self._compare_dates(ocr_norm, form_norm, ocr_value, form_value, field_name)
         
         # Numeric comparison
         if isinstance(ocr_value, (int, float)) or isinstance(form_value, (int, float)):
@@ -83,44 +260,57 @@ class DataComparator:
         
         # Remove special characters for certain fields
         if field_name in ["name", "address"]:
-            value_str = re.sub(r"[^\w\s]", "", value_str)
+            value_str = _RE_PUNCT.sub("", value_str)
         
         # Remove spaces for phone numbers
         if field_name == "phone":
-            value_str = re.sub(r"[^\d+]", "", value_str)
+            value_str = _RE_PHONE.sub("", value_str)
         
         # Normalize whitespace
-        value_str = " ".join(value_str.split())
+        value_str = _RE_WS.sub(" ", value_str).strip()
         
         return value_str
     
+    def _parse_date(self, value: Any, field_name: str) -> Optional[datetime]:
+        """Parse a date, trying ISO 8601 (C fast path) before strptime formats"""
+        value_str = str(value)
+        try:
+            return datetime.fromisoformat(value_str)
+        except ValueError:
+            pass
+        
+        cached_fmt = self._field_date_fmt.get(field_name)
+        if cached_fmt:
+            try:
+                return datetime.strptime(value_str, cached_fmt)
+            except ValueError:
+                pass
+        
+        for fmt in _DATE_FORMATS:
+            if fmt == cached_fmt:
+                continue
+            try:
+                parsed = datetime.strptime(value_str, fmt)
+            except ValueError:
+                continue
+            if fmt not in _UNCACHED_DATE_FORMATS:
+                self._field_date_fmt[field_name] = fmt
+            return parsed
+        
+        return None
+    
     def _compare_dates(
         self,
         ocr_norm: str,
         form_norm: str,
         ocr_orig: Any,
-        form_orig: Any
+        form_orig: Any,
+        field_name: str
     ) -> Dict:
         """Compare date values"""
         # Try to parse dates
-        date_formats = ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y"]
-        
-        ocr_date = None
-        form_date = None
-        
-        for fmt in date_formats:
-            try:
-                ocr_date = datetime.strptime(str(ocr_orig), fmt)
-                break
-            except ValueError:
-                continue
-        
-        for fmt in date_formats:
-            try:
-                form_date = datetime.strptime(str(form_orig), fmt)
-                break
-            except ValueError:
-                continue
+        ocr_date = self._parse_date(ocr_orig, field_name)
+        form_date = self._parse_date(form_orig, field_name)
         
         if ocr_date and form_date:
             match = ocr_date == form_date
@@ -1,4 +1,5 @@
 from typing import Dict, List
+import numpy as np
 
 
 class ConfidenceCalculator:
@@ -34,20 +35,23 @@ class ConfidenceCalculator:
     @staticmethod
     def calculate_overall_confidence(field_results: Dict) -> Dict:
         """Calculate overall confidence across all fields"""
-        scores = [
-            result["confidence"]
-            for result in field_results.values()
-            if "confidence" in result
-        ]
+        scores = np.fromiter(
+            (
+                result["confidence"]
+                for result in field_results.values()
+                if "confidence" in result
+            ),
+            dtype=np.float64
+        )
         
-        if not scores:
+        if not scores.size:
             return {"overall_score": 0.0, "level": "No Data"}
         
-        avg_score = sum(scores) / len(scores)
+        avg_score = float(scores.mean())
         
         return {
             "overall_score": round(avg_score, 3),
             "level": ConfidenceCalculator._get_confidence_level(avg_score),
-            "fields_checked": len(scores),
-            "fields_matched": sum(1 for s in scores if s >= 0.85)
+            "fields_checked": int(scores.size),
+            "fields_matched": int((scores >= 0.85).sum())
         }